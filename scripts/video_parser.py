@@ -1,119 +1,473 @@
 import sys
 import os
+import re
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import ctranslate2
+import numpy as np
 import yt_dlp
-from faster_whisper import WhisperModel
-import json
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+import orjson
 import tqdm
 
 
-def extract_audio(video_path: str) -> str:
-    """从视频中提取音频"""
-    import ffmpeg
-
-    audio_path = os.path.splitext(video_path)[0] + '.wav'
-    stream = ffmpeg.input(video_path)
-    stream = ffmpeg.output(stream, audio_path, acodec='pcm_s16le', ar=16000)
-    ffmpeg.run(stream, overwrite_output=True, quiet=True)
-    return audio_path
+def transcribe_audio(audio_path: str, model: BatchedInferencePipeline,
+                     output_path: str = None, subtitle_format: str = 'txt',
+                     vad_filter: bool = True, tqdm_position: int = 0) -> dict:
+    """使用Faster Whisper转录音频
 
+    faster-whisper 内部通过 ffmpeg 解码，可以直接传入视频文件路径，
+    无需预先提取 WAV 音频。
 
-def transcribe_audio(audio_path: str, model: WhisperModel) -> dict:
-    """使用Faster Whisper转录音频
+    给定 output_path 且格式为 txt/srt/vtt 时走流式路径：片段从生成器
+    出来立即写入文件，内存占用与音频长度无关，写盘也与 Whisper 解码
+    重叠；返回结果只含统计信息。json 需要完整结构，仍在内存中收集。
 
     Args:
-        audio_path: 音频文件路径
-        model: Faster Whisper模型
+        audio_path: 音频或视频文件路径
+        model: Faster Whisper批量推理管线
+        output_path: 字幕输出路径 (None 表示收集片段后由调用方保存)
+        subtitle_format: 流式写盘时的字幕格式，支持: txt, srt, vtt
+        vad_filter: 是否用 Silero VAD 跳过静音区间，减少无效计算
+        tqdm_position: 进度条行号 (多GPU并行转录时每个线程一行)
     """
 
-    # 获取转录结果和信息
-    result, info = model.transcribe(audio=audio_path)
+    # 获取转录结果和信息 (batch_size 将多个30秒窗口合并为一次前向计算;
+    # vad_filter 先剔除静音窗口，片段时间戳仍对应原始音频时间轴)
+    if vad_filter:
+        result, info = model.transcribe(audio=audio_path, batch_size=16,
+                                        vad_filter=True,
+                                        vad_parameters=dict(min_silence_duration_ms=500))
+    else:
+        # 批量管线关闭 VAD 时要求 clip_timestamps，超过30秒的音频会直接
+        # 报错；此时退回底层 WhisperModel 的串行转录
+        result, info = model.model.transcribe(audio=audio_path)
+
+    fmt = subtitle_format.lower()
+    if output_path is None or fmt == 'json':
+        # 收集所有片段，带进度条；完整文本在同一趟循环中累积，避免二次遍历
+        segments = []
+        text_parts = []
+        with tqdm.tqdm(total=info.duration, unit="seconds", desc="Transcribing",
+                       position=tqdm_position) as pbar:
+            for segment in result:
+                segments.append({
+                    "start": segment.start,
+                    "end": segment.end,
+                    "text": segment.text
+                })
+                text_parts.append(segment.text)
+                pbar.update(segment.end - pbar.n)
+
+        # 获取完整文本
+        text = "".join(text_parts)
+
+        return {
+            "text": text,
+            "segments": segments
+        }
 
-    # 收集所有片段，带进度条
-    segments = []
-    with tqdm.tqdm(total=info.duration, unit="seconds", desc="Transcribing") as pbar:
+    # 流式路径：逐片段写盘，不在内存中保留片段列表
+    millis_sep = ',' if fmt == 'srt' else '.'
+    segment_count = 0
+    text_length = 0
+    pending_text = None  # txt: 最后一个片段延迟写入，以便去掉末尾空白
+    with open(output_path, 'w', encoding='utf-8', buffering=1024 * 1024) as f, \
+            tqdm.tqdm(total=info.duration, unit="seconds", desc="Transcribing",
+                      position=tqdm_position) as pbar:
+        if fmt == 'vtt':
+            f.write("WEBVTT\n\n")
         for segment in result:
-            segments.append({
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text
-            })
+            segment_count += 1
+            text = segment.text
+            text_length += len(text)
+            if fmt == 'srt':
+                start_time = format_time(segment.start, millis_sep)
+                end_time = format_time(segment.end, millis_sep)
+                f.write(f"{segment_count}\n{start_time} --> {end_time}\n{text.strip()}\n\n")
+            elif fmt == 'vtt':
+                start_time = format_time(segment.start, millis_sep)
+                end_time = format_time(segment.end, millis_sep)
+                f.write(f"{start_time} --> {end_time}\n{text.strip()}\n\n")
+            else:  # txt
+                # 延迟一个片段写入：循环结束后对最后一段 rstrip，
+                # 与 _write_txt 的 result['text'].strip() 输出保持一致
+                if pending_text:
+                    f.write(pending_text)
+                pending_text = text.lstrip() if segment_count == 1 else text
             pbar.update(segment.end - pbar.n)
-
-    # 获取完整文本
-    text = "".join([seg["text"] for seg in segments])
+        if pending_text:
+            f.write(pending_text.rstrip())
 
     return {
-        "text": text,
-        "segments": segments
+        "path": output_path,
+        "segment_count": segment_count,
+        "text_length": text_length
     }
 
 
+def _write_txt(output_path: str, result: dict):
+    """纯文本格式：直接保存所有文本"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(result['text'].strip())
+
+
+def _write_json(output_path: str, result: dict):
+    """JSON格式 (orjson 直接输出 UTF-8 字节，按二进制写入)"""
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+
+
+def _write_srt(output_path: str, result: dict):
+    """SRT格式，时间戳格式: HH:MM:SS,mmm (批量向量化转换)"""
+    segments = result['segments']
+    starts = format_times([seg['start'] for seg in segments], ',')
+    ends = format_times([seg['end'] for seg in segments], ',')
+    # 先在内存中拼好所有片段，一次性写入，避免每个片段一次 f.write
+    lines = [
+        f"{idx}\n{start_time} --> {end_time}\n{seg['text'].strip()}\n\n"
+        for idx, (seg, start_time, end_time) in enumerate(zip(segments, starts, ends), 1)
+    ]
+    with open(output_path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        f.write(''.join(lines))
+
+
+def _write_vtt(output_path: str, result: dict):
+    """VTT格式，时间戳格式: HH:MM:SS.mmm (批量向量化转换)"""
+    segments = result['segments']
+    starts = format_times([seg['start'] for seg in segments], '.')
+    ends = format_times([seg['end'] for seg in segments], '.')
+    # 同样拼好后一次性写入
+    lines = ["WEBVTT\n\n"]
+    lines.extend(
+        f"{start_time} --> {end_time}\n{seg['text'].strip()}\n\n"
+        for seg, start_time, end_time in zip(segments, starts, ends)
+    )
+    with open(output_path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        f.write(''.join(lines))
+
+
+# 字幕格式到写入函数的分发表，替代逐格式的 if/elif 链
+_WRITERS = {
+    'txt': _write_txt,
+    'json': _write_json,
+    'srt': _write_srt,
+    'vtt': _write_vtt,
+}
+
+
 def save_subtitle(audio_path: str, result: dict, output_folder: str, subtitle_format: str = 'txt'):
     """保存字幕文件
 
     Args:
-        audio_path: 音频文件路径
+        audio_path: 音频或视频文件路径 (仅用于推导字幕文件名)
         result: Faster Whisper 转录结果
         output_folder: 输出目录
         subtitle_format: 字幕格式，支持: txt, srt, vtt, json
     """
-    # 获取不带扩展名的音频文件名
+    # 格式名只做一次小写转换，供路径拼接和分发复用
+    fmt = subtitle_format.lower()
+    # 获取不带扩展名的文件名 (视频扩展名同样被去除)
     audio_filename = os.path.splitext(os.path.basename(audio_path))[0]
-    output_path = os.path.join(output_folder, f"{audio_filename}.{subtitle_format.lower()}")
-
-    if subtitle_format.lower() == 'txt':
-        # 纯文本格式：直接保存所有文本
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(result['text'].strip())
-
-    elif subtitle_format.lower() == 'json':
-        # JSON格式
-        import json
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-
-    elif subtitle_format.lower() == 'srt':
-        # SRT格式
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for idx, seg in enumerate(result['segments'], 1):
-                # SRT时间格式: HH:MM:SS,mmm
-                start_time = format_srt_time(seg['start'])
-                end_time = format_srt_time(seg['end'])
-                # 清理文本，去除多余空格
-                text = seg['text'].strip()
-                f.write(f"{idx}\n{start_time} --> {end_time}\n{text}\n\n")
-
-    elif subtitle_format.lower() == 'vtt':
-        # VTT格式
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("WEBVTT\n\n")
-            for seg in result['segments']:
-                # VTT时间格式: HH:MM:SS.mmm
-                start_time = format_vtt_time(seg['start'])
-                end_time = format_vtt_time(seg['end'])
-                # 清理文本，去除多余空格
-                text = seg['text'].strip()
-                f.write(f"{start_time} --> {end_time}\n{text}\n\n")
+    output_path = os.path.join(output_folder, f"{audio_filename}.{fmt}")
+
+    writer = _WRITERS.get(fmt)
+    if writer is not None:
+        writer(output_path, result)
 
     return output_path
 
 
-def format_srt_time(seconds: float) -> str:
-    """将秒数转换为SRT时间格式 HH:MM:SS,mmm"""
+def format_time(seconds: float, millis_sep: str) -> str:
+    """将单个秒数转换为 HH:MM:SS?mmm 时间戳 (流式写盘的标量版本)"""
     hours = int(seconds // 3600)
     minutes = int((seconds % 3600) // 60)
     secs = int(seconds % 60)
     millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{millis_sep}{millis:03d}"
 
 
-def format_vtt_time(seconds: float) -> str:
-    """将秒数转换为VTT时间格式 HH:MM:SS.mmm"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+def format_times(seconds_list: list, millis_sep: str) -> list:
+    """批量将秒数转换为 HH:MM:SS?mmm 时间戳
+
+    用 NumPy 一次性完成所有时间的除法运算，避免长音频的
+    数千个片段逐个做 Python 浮点运算。
+
+    Args:
+        seconds_list: 秒数列表
+        millis_sep: 毫秒分隔符 (SRT用',', VTT用'.')
+    """
+    arr = np.asarray(seconds_list, dtype=np.float64)
+    hours, rem = np.divmod(arr, 3600)
+    minutes, secs = np.divmod(rem, 60)
+    millis = ((arr % 1) * 1000).astype(int)
+    return [f"{int(h):02d}:{int(m):02d}:{int(s):02d}{millis_sep}{ms:03d}"
+            for h, m, s, ms in zip(hours, minutes, secs, millis)]
+
+
+# 模型缓存：相同参数的模型只反序列化一次，长驻进程中重复调用
+# download_videos 时省去每次数秒到数十秒的加载时间
+_MODEL_CACHE: dict = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _get_model(model_name: str, device: str, compute_type: str,
+               device_index: int = 0) -> WhisperModel:
+    """按 (model_name, device, compute_type, device_index) 缓存并复用 WhisperModel"""
+    key = (model_name, device, compute_type, device_index)
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is None:
+            model = WhisperModel(model_name, device=device, compute_type=compute_type,
+                                 device_index=device_index)
+            _MODEL_CACHE[key] = model
+        return model
+
+
+def _default_compute_type() -> str:
+    """根据硬件选择默认的 CTranslate2 计算精度
+
+    GPU 上 int8_float16 将权重量化为 int8、激活保持 float16，权重带宽
+    减半且几乎不损失识别精度；CPU 上 int8 可利用 VNNI 整数点积指令。
+    """
+    if ctranslate2.get_cuda_device_count() > 0:
+        return "int8_float16"
+    return "int8"
+
+
+# 文件名非法字符过滤：保留字母数字(含中日文等)、空格、'-'、'_'
+# 预编译后热路径只剩一次 C 级替换，不再逐字符调用 isalnum
+_SANITIZE_RE = re.compile(r'[^\w \-]+', re.UNICODE)
+
+# 串行化多线程下载的进度输出，避免不同任务的进度行交错
+_print_lock = threading.Lock()
+
+# 每个下载任务最近一次进度输出的时间，用于限频
+_last_progress_time: dict = {}
+
+
+def format_size(bytes_val) -> str:
+    """格式化文件大小"""
+    if bytes_val >= 1024 * 1024 * 1024:
+        return f"{bytes_val / 1024 / 1024 / 1024:.2f} GB"
+    elif bytes_val >= 1024 * 1024:
+        return f"{bytes_val / 1024 / 1024:.2f} MB"
+    elif bytes_val >= 1024:
+        return f"{bytes_val / 1024:.2f} KB"
+    else:
+        return f"{bytes_val} B"
+
+
+def print_progress(d, title):
+    """yt-dlp 下载进度回调
+
+    yt-dlp 每收到一个网络缓冲区就会调用一次；这里限频至每任务
+    每秒最多10次输出，避免高速下载时大量冗余打印阻塞下载线程。
+    多线程下载时通过 _print_lock 串行化输出。
+    """
+    if d['status'] == 'downloading':
+        now = time.monotonic()
+        if now - _last_progress_time.get(title, 0.0) < 0.1:
+            return
+        _last_progress_time[title] = now
+
+        total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
+        downloaded_bytes = d.get('downloaded_bytes', 0)
+        speed = d.get('speed', 0)
+
+        speed_str = f"{speed / 1024 / 1024:.2f} MB/s" if speed else "N/A"
+        with _print_lock:
+            if total > 0:
+                percent = downloaded_bytes / total * 100
+                print(f"\r[{title}] {format_size(downloaded_bytes)} / {format_size(total)} ({percent:.1f}%) | 速度: {speed_str}", end='')
+            else:
+                # 没有总大小时，只显示已下载大小和速度
+                print(f"\r[{title}] 已下载: {format_size(downloaded_bytes)} | 速度: {speed_str}", end='')
+    elif d['status'] == 'finished':
+        total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
+        _last_progress_time.pop(title, None)
+        with _print_lock:
+            print(f"\n[{title}] 下载完成! 文件大小: {format_size(total)}", flush=True)
+
+
+def _download_one(url: str, idx: int, output_path: str,
+                  download_subtitle: bool, subtitle_format: str) -> dict:
+    """下载单个视频，返回视频信息字典
+
+    供下载线程池并发调用，每个任务使用独立的 YoutubeDL 实例。
+    如果视频文件已存在则跳过下载；下载后文件不存在时返回 None。
+
+    Args:
+        url: 视频URL
+        idx: URL在输入列表中的序号 (用于默认标题)
+        output_path: 下载保存路径
+        download_subtitle: 是否下载视频自带字幕
+        subtitle_format: 字幕格式
+    """
+    with yt_dlp.YoutubeDL({}) as ydl:
+        # 先获取视频信息，确定文件夹名称
+        info = ydl.extract_info(url, download=False)
+
+    video_title = info.get('title', f'video_{idx + 1}')
+    # 清理文件名中的非法字符
+    safe_title = _SANITIZE_RE.sub('', video_title).strip()
+    video_folder = os.path.join(output_path, safe_title)
+    os.makedirs(video_folder, exist_ok=True)
+
+    # 下载视频到对应文件夹
+    ydl_opts = {
+        'outtmpl': f'{video_folder}/%(title)s.%(ext)s',
+        'format': 'bestvideo+bestaudio/best',
+        'progress_hooks': [lambda d, t=video_title: print_progress(d, t)],
+    }
+
+    # 如果需要下载视频自带的字幕
+    if download_subtitle:
+        ydl_opts['writesubtitles'] = True
+        ydl_opts['subtitleslangs'] = ['zh-Hans', 'zh-CN', 'zh-TW', 'en', 'ja', 'all']
+        ydl_opts['subtitlesformat'] = subtitle_format
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl_video:
+        # 用下载模板推导实际落盘的文件名，确保与存在性检查比较的是同一个名字
+        video_path = ydl_video.prepare_filename(info)
+
+        # 检查视频是否已存在 (一次 listdir 代替逐文件 stat，NFS 等高延迟文件系统上更快)
+        existing = set(os.listdir(video_folder))
+        if os.path.basename(video_path) in existing:
+            with _print_lock:
+                print(f"[{video_title}] 文件已存在，跳过下载")
+            return {
+                "title": video_title,
+                "url": url,
+                "video_path": video_path,
+                "video_folder": video_folder
+            }
+
+        # 复用已提取的 info，避免 download([url]) 再发一次元数据请求
+        ydl_video.process_ie_result(info, download=True)
+        video_path = ydl_video.prepare_filename(info)
+
+    if not os.path.exists(video_path):
+        return None
+
+    return {
+        "title": video_title,
+        "url": url,
+        "video_path": video_path,
+        "video_folder": video_folder
+    }
+
+
+def _transcribe_worker(task_queue: queue.Queue, model: BatchedInferencePipeline, model_lock: threading.Lock,
+                       transcripts: list, subtitle_format: str, overwrite_subtitle: bool,
+                       vad_filter: bool, position: int = 0):
+    """转录工作线程：从队列中取出已下载完成的视频并依次转录
+
+    下载线程每完成一个视频就放入队列，本线程立即开始提取音频和转录，
+    使网络下载与 ffmpeg/Whisper 计算重叠执行。收到 None 哨兵后退出。
+
+    Args:
+        task_queue: 下载完成的视频信息队列 (None 表示结束)
+        model: Faster Whisper模型 (所有转录共享一个实例)
+        model_lock: 模型锁 (CTranslate2 不可重入)
+        transcripts: 转录结果列表 (由本线程追加)
+        subtitle_format: 字幕格式
+        overwrite_subtitle: 是否覆盖已存在的字幕文件
+        vad_filter: 是否用 Silero VAD 跳过静音区间
+        position: 工作线程序号，同时作为 tqdm 进度条行号 (多GPU并行时各占一行)
+    """
+    # 字幕写盘交给单独线程，与下一个视频的转录重叠，隐藏磁盘延迟
+    save_executor = ThreadPoolExecutor(max_workers=1)
+    pending_saves = []  # (写盘future, 对应的转录结果条目)
+
+    while True:
+        video_info = task_queue.get()
+        try:
+            if video_info is None:
+                # 等待所有异步写盘完成后再退出
+                for save_future, entry in pending_saves:
+                    try:
+                        entry["transcript"] = save_future.result()
+                    except Exception as e:
+                        with _print_lock:
+                            print(f"字幕保存失败 {entry['title']}: {str(e)}")
+                        entry["transcript"] = None
+                        entry["error"] = str(e)
+                save_executor.shutdown()
+                return
+
+            video_title = video_info["title"]
+            url = video_info["url"]
+            video_path = video_info["video_path"]
+            video_folder = video_info["video_folder"]
+            idx = video_info["index"]
+            total = video_info["total"]
+
+            # 检查字幕文件是否已存在 (一次 listdir 代替逐文件 stat)
+            audio_filename = os.path.splitext(os.path.basename(video_path))[0]
+            subtitle_path = os.path.join(video_folder, f"{audio_filename}.{subtitle_format.lower()}")
+            existing = set(os.listdir(video_folder)) if os.path.isdir(video_folder) else set()
+            if os.path.basename(subtitle_path) in existing and not overwrite_subtitle:
+                with _print_lock:
+                    print(f"\n[{idx}/{total}] 字幕文件已存在，跳过转录: {video_title}")
+                transcripts.append({
+                    "title": video_title,
+                    "url": url,
+                    "transcript": subtitle_path,
+                    "format": subtitle_format
+                })
+                continue
+
+            try:
+                with _print_lock:
+                    print(f"\n[{idx}/{total}] 正在转录: {video_title}")
+
+                # 直接把视频文件交给 faster-whisper 解码，省去一次 ffmpeg 转 WAV
+                if subtitle_format.lower() == 'json':
+                    # JSON 需要完整片段结构：先收集，再异步写盘
+                    with model_lock:
+                        transcript = transcribe_audio(video_path, model, vad_filter=vad_filter,
+                                                      tqdm_position=position)
+
+                    # 提交字幕写盘任务，不等待写盘即开始下一个视频的转录
+                    with _print_lock:
+                        print(f"\n[{idx}/{total}] 正在保存字幕文件...")
+                    save_future = save_executor.submit(
+                        save_subtitle, video_path, transcript, video_folder, subtitle_format)
+                    entry = {
+                        "title": video_title,
+                        "url": url,
+                        "transcript": subtitle_path,  # 写盘完成后由 future 结果确认
+                        "format": subtitle_format
+                    }
+                    pending_saves.append((save_future, entry))
+                else:
+                    # txt/srt/vtt 流式写盘：片段边生成边写入，内存占用 O(1)
+                    with model_lock:
+                        transcribe_audio(video_path, model, subtitle_path, subtitle_format,
+                                         vad_filter=vad_filter, tqdm_position=position)
+                    entry = {
+                        "title": video_title,
+                        "url": url,
+                        "transcript": subtitle_path,
+                        "format": subtitle_format
+                    }
+                transcripts.append(entry)
+                with _print_lock:
+                    print(f"\n[{idx}/{total}] 转录完成: {video_title}")
+            except Exception as e:
+                with _print_lock:
+                    print(f"转录失败 {video_title}: {str(e)}")
+                transcripts.append({
+                    "title": video_title,
+                    "url": url,
+                    "transcript": None,
+                    "error": str(e)
+                })
+        finally:
+            task_queue.task_done()
 
 
 def download_videos(json_input: str) -> dict:
@@ -125,134 +479,115 @@ def download_videos(json_input: str) -> dict:
             - urls: 视频URL列表 (必须)
             - output: 下载保存路径 (默认: "./downloads")
             - model: Faster Whisper模型名称 (默认: "small")
+            - compute_type: CTranslate2计算精度 (默认: GPU用"int8_float16", CPU用"int8")
             - transcribe: 是否进行转录 (默认: True)
             - subtitle_format: 字幕格式，支持: txt, srt, vtt, json (默认: "txt")
             - download_subtitle: 是否下载视频自带字幕 (默认: False)
             - overwrite_subtitle: 是否覆盖已存在的字幕文件 (默认: True)
+            - vad_filter: 是否用VAD跳过静音区间 (默认: True)
 
     Returns:
         结果字典
     """
     try:
-        params = json.loads(json_input)
-    except json.JSONDecodeError as e:
+        params = orjson.loads(json_input)
+    except orjson.JSONDecodeError as e:
         return {"success": False, "message": f"JSON解析失败: {str(e)}", "downloaded": [], "transcripts": []}
 
     urls = params.get("urls", [])
     output_path = params.get("output", "./downloads")
     model_name = params.get("model", "small")
+    compute_type = params.get("compute_type") or _default_compute_type()  # CTranslate2计算精度
     transcribe = params.get("transcribe", True)  # 是否进行转录
     subtitle_format = params.get("subtitle_format", "txt")  # 字幕格式
     download_subtitle = params.get("download_subtitle", False)  # 是否下载视频自带字幕
     overwrite_subtitle = params.get("overwrite_subtitle", True)  # 是否覆盖已存在的字幕文件
+    vad_filter = params.get("vad_filter", True)  # 是否用VAD跳过静音区间
 
     if not urls:
         return {"success": False, "message": "URL列表为空", "downloaded": [], "transcripts": []}
 
+    # URL去重 (保持原始顺序)，避免重复的元数据请求、下载和转录
+    unique_urls = list(dict.fromkeys(urls))
+    if len(unique_urls) < len(urls):
+        print(f"已忽略 {len(urls) - len(unique_urls)} 个重复URL")
+    urls = unique_urls
+
     os.makedirs(output_path, exist_ok=True)
 
     downloaded = []
-    video_list = []  # 存储下载后的视频信息，用于后续转录
+    video_list = []  # 存储下载后的视频信息
+    transcripts = []
+
+    # ========== 流水线：下载与转录并行 ==========
+    # 下载线程每完成一个视频就放入有界队列，转录线程立即消费，
+    # 使网络下载与 Whisper 推理重叠，整体耗时约等于两者中较慢的一个。
+    task_queue = queue.Queue(maxsize=2)  # 有界队列，避免磁盘无限堆积
+    transcribe_threads = []
+
+    if transcribe:
+        # 提前加载模型，确保第一个视频下载完成时可以立刻开始转录
+        # compute_type: 默认 GPU 用 int8_float16、CPU 用 int8 (见 _default_compute_type)
+        # 多GPU时每块卡各建一个模型副本，由独立的转录线程消费同一队列，
+        # 转录阶段随GPU数量近线性加速；单GPU/CPU时退化为单副本
+        print("正在加载 Faster Whisper 模型...")
+        n_gpus = ctranslate2.get_cuda_device_count()
+        if n_gpus > 1:
+            replicas = [_get_model(model_name, "cuda", compute_type, device_index=i)
+                        for i in range(n_gpus)]
+        else:
+            # device: "auto" 自动选择 CUDA 或 CPU
+            replicas = [_get_model(model_name, "auto", compute_type)]
+
+        for worker_idx, replica in enumerate(replicas):
+            # 批量推理管线：把多个30秒音频窗口打包成一次前向计算，长音频显著加速
+            pipeline = BatchedInferencePipeline(model=replica)
+            # 预热：用1秒静音跑一次前向，提前完成 CUDA 上下文初始化和
+            # cuDNN 算法选择，冷启动开销不再算在第一个视频头上。
+            # 必须关掉 VAD，否则静音被整段过滤、编码器/解码器根本不会执行;
+            # 指定语言以跳过对静音无意义的语言检测
+            warmup_segments, _ = pipeline.transcribe(audio=np.zeros(16000, dtype=np.float32),
+                                                     vad_filter=False, language="en")
+            list(warmup_segments)
+            thread = threading.Thread(
+                target=_transcribe_worker,
+                args=(task_queue, pipeline, threading.Lock(), transcripts, subtitle_format,
+                      overwrite_subtitle, vad_filter, worker_idx),
+                daemon=True
+            )
+            thread.start()
+            transcribe_threads.append(thread)
 
-    # ========== 第一步：下载所有视频 ==========
     print("=" * 50)
     print("开始下载视频...")
     print("=" * 50)
 
-    with yt_dlp.YoutubeDL({}) as ydl:
-        for idx, url in enumerate(urls):
+    # 多线程并发下载，提高带宽利用率；按完成顺序送入转录队列
+    max_workers = min(4, len(urls))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_download_one, url, idx, output_path,
+                            download_subtitle, subtitle_format): url
+            for idx, url in enumerate(urls)
+        }
+        for future in as_completed(futures):
+            url = futures[future]
             try:
-                # 先获取视频信息，确定文件夹名称
-                info = ydl.extract_info(url, download=False)
-                video_title = info.get('title', f'video_{idx + 1}')
-                # 清理文件名中的非法字符
-                safe_title = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).strip()
-                video_folder = os.path.join(output_path, safe_title)
-                os.makedirs(video_folder, exist_ok=True)
-
-                # 检查视频是否已存在
-                video_path = ydl.prepare_filename(info)
-                if os.path.exists(video_path):
-                    print(f"[{video_title}] 文件已存在，跳过下载")
-                    downloaded.append(url)
-                    video_list.append({
-                        "title": video_title,
-                        "url": url,
-                        "video_path": video_path,
-                        "video_folder": video_folder
-                    })
-                    print(f"[{video_title}] 已添加到转录队列")
+                video_info = future.result()
+                if video_info is None:
                     continue
-
-                # 下载视频到对应文件夹
-                ydl_opts = {
-                    'outtmpl': f'{video_folder}/%(title)s.%(ext)s',
-                    'format': 'bestvideo+bestaudio/best',
-                    'progress_hooks': [lambda d, t=video_title: print_progress(d, t)],
-                }
-
-                # 如果需要下载视频自带的字幕
-                if download_subtitle:
-                    ydl_opts['writesubtitles'] = True
-                    ydl_opts['subtitleslangs'] = ['zh-Hans', 'zh-CN', 'zh-TW', 'en', 'ja', 'all']
-                    ydl_opts['subtitlesformat'] = subtitle_format
-
-                def print_progress(d, title):
-                    if d['status'] == 'downloading':
-                        total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-                        downloaded_bytes = d.get('downloaded_bytes', 0)
-                        speed = d.get('speed', 0)
-
-                        # 格式化文件大小
-                        def format_size(bytes_val):
-                            if bytes_val >= 1024 * 1024 * 1024:
-                                return f"{bytes_val / 1024 / 1024 / 1024:.2f} GB"
-                            elif bytes_val >= 1024 * 1024:
-                                return f"{bytes_val / 1024 / 1024:.2f} MB"
-                            elif bytes_val >= 1024:
-                                return f"{bytes_val / 1024:.2f} KB"
-                            else:
-                                return f"{bytes_val} B"
-
-                        speed_str = f"{speed / 1024 / 1024:.2f} MB/s" if speed else "N/A"
-                        if total > 0:
-                            percent = downloaded_bytes / total * 100
-                            print(f"\r[{title}] {format_size(downloaded_bytes)} / {format_size(total)} ({percent:.1f}%) | 速度: {speed_str}", end='', flush=True)
-                        else:
-                            # 没有总大小时，只显示已下载大小和速度
-                            print(f"\r[{title}] 已下载: {format_size(downloaded_bytes)} | 速度: {speed_str}", end='', flush=True)
-                    elif d['status'] == 'finished':
-                        total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-
-                        def format_size(bytes_val):
-                            if bytes_val >= 1024 * 1024 * 1024:
-                                return f"{bytes_val / 1024 / 1024 / 1024:.2f} GB"
-                            elif bytes_val >= 1024 * 1024:
-                                return f"{bytes_val / 1024 / 1024:.2f} MB"
-                            elif bytes_val >= 1024:
-                                return f"{bytes_val / 1024:.2f} KB"
-                            else:
-                                return f"{bytes_val} B"
-
-                        print(f"\n[{title}] 下载完成! 文件大小: {format_size(total)}")
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl_video:
-                    ydl_video.download([url])
-                    video_path = ydl_video.prepare_filename(info)
-
-                if os.path.exists(video_path):
-                    downloaded.append(url)
-                    video_list.append({
-                        "title": video_title,
-                        "url": url,
-                        "video_path": video_path,
-                        "video_folder": video_folder
-                    })
-                    print(f"[{video_title}] 已添加到转录队列")
+                video_info["index"] = len(video_list) + 1
+                video_info["total"] = len(urls)
+                downloaded.append(url)
+                video_list.append(video_info)
+                if transcribe:
+                    task_queue.put(video_info)  # 队列已满时阻塞，形成背压
+                    with _print_lock:
+                        print(f"[{video_info['title']}] 已添加到转录队列")
             except Exception as e:
                 print(f"下载失败 {url}: {str(e)}")
 
-    # ========== 第二步：转录所有视频 ==========
+    # ========== 收尾：等待转录线程处理完队列 ==========
     if not transcribe:
         # 不需要转录，只下载视频
         print("\n" + "=" * 50)
@@ -266,61 +601,14 @@ def download_videos(json_input: str) -> dict:
         }
 
     print("\n" + "=" * 50)
-    print(f"视频下载完成，开始转录 {len(video_list)} 个视频...")
+    print(f"视频下载完成，等待 {len(video_list)} 个视频转录结束...")
     print("=" * 50)
 
-    # 使用 Faster Whisper 加载模型
-    # device: "auto" 自动选择 CUDA 或 CPU
-    # compute_type: "auto" 自动选择最佳精度 (float16 for CUDA, int8 for CPU)
-    model = WhisperModel(model_name, device="auto", compute_type="auto")
-    transcripts = []
-    for idx, video_info in enumerate(video_list):
-        video_title = video_info["title"]
-        url = video_info["url"]
-        video_path = video_info["video_path"]
-        video_folder = video_info["video_folder"]
-
-        # 检查字幕文件是否已存在
-        audio_filename = os.path.splitext(os.path.basename(video_path))[0]
-        subtitle_path = os.path.join(video_folder, f"{audio_filename}.{subtitle_format.lower()}")
-        if os.path.exists(subtitle_path) and not overwrite_subtitle:
-            print(f"\n[{idx + 1}/{len(video_list)}] 字幕文件已存在，跳过转录: {video_title}")
-            transcripts.append({
-                "title": video_title,
-                "url": url,
-                "transcript": subtitle_path,
-                "format": subtitle_format
-            })
-            continue
-
-        print(f"\n[{idx + 1}/{len(video_list)}] 正在提取音频: {video_title}")
-        try:
-            audio_path = extract_audio(video_path)
-            print(f"[{idx + 1}/{len(video_list)}] 正在转录: {video_title}")
-
-            transcript = transcribe_audio(audio_path, model)
-            print()  # 换行
-
-            # 保存字幕文件
-            print(f"[{idx + 1}/{len(video_list)}] 正在保存字幕文件...")
-            transcript_filename = save_subtitle(audio_path, transcript, video_folder, subtitle_format)
-            print(f"[{idx + 1}/{len(video_list)}] 字幕文件已保存")
-
-            transcripts.append({
-                "title": video_title,
-                "url": url,
-                "transcript": transcript_filename,
-                "format": subtitle_format
-            })
-            print(f"[{idx + 1}/{len(video_list)}] 转录完成: {video_title}")
-        except Exception as e:
-            print(f"转录失败 {video_title}: {str(e)}")
-            transcripts.append({
-                "title": video_title,
-                "url": url,
-                "transcript": None,
-                "error": str(e)
-            })
+    # 每个转录线程发送一个哨兵并等待全部退出
+    for _ in transcribe_threads:
+        task_queue.put(None)
+    for thread in transcribe_threads:
+        thread.join()
 
     return {
         "success": True,
@@ -338,10 +626,12 @@ if __name__ == "__main__":
         print("  urls: 视频URL列表 (必须)")
         print("  output: 下载保存路径 (默认: './downloads')")
         print("  model: Faster Whisper模型 (默认: 'small', 可选: tiny/base/small/medium/large/large-v2/large-v3/turbo)")
+        print("  compute_type: CTranslate2计算精度 (默认: GPU用'int8_float16', CPU用'int8')")
         print("  transcribe: 是否转录 (默认: True)")
         print("  subtitle_format: 字幕格式 (默认: 'txt', 可选: txt/srt/vtt/json)")
         print("  download_subtitle: 是否下载视频自带字幕 (默认: False)")
         print("  overwrite_subtitle: 是否覆盖已存在的字幕文件 (默认: True)")
+        print("  vad_filter: 是否用VAD跳过静音区间 (默认: True)")
         print()
         print('示例1 - 下载并转录: python video_parser.py \'{"urls":["URL"],"output":"./downloads"}\'')
         print('示例2 - 只下载不转录: python video_parser.py \'{"urls":["URL"],"output":"./downloads","transcribe":false}\'')